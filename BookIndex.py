@@ -0,0 +1,254 @@
+from array import array
+import bisect
+import math
+
+#Bucket widths used for the histograms returned by BookIndex.Facets
+FACET_BUCKETS = {"rating": 0.25, "release_date": 25, "length": 200, "series_length": 1000}
+
+#Offsets of the set bits in each byte value, used to read the ids in a bitmap one byte at a time
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+"""Builds a bitmap from book ids. The bits are set in a byte buffer and converted to an int once, since setting
+them one at a time on an int copies the whole bitmap for every book.
+
+Args:   book_ids (iterable): Ids of the books in the bitmap
+        num_books (int): Number of books in the database
+
+Returns: int: Bitmap of the book ids"""
+def IdsBitmap(book_ids, num_books):
+    buffer = bytearray((num_books + 7) // 8)
+    for book_id in book_ids:
+        buffer[book_id >> 3] |= 1 << (book_id & 7)
+    return int.from_bytes(buffer, "little")
+
+#Index over the book database. Each book gets an integer id and each genre a bitmap of the ids of the books in it,
+#so genre queries become bitwise operations and result counts become popcounts.
+class BookIndex:
+    """Builds the index from the book database.
+
+    Args:   genre_dictionary (GenreDictionary): Dictionary of all unique genres in the database
+            booklist (dict): Dictionary of books with their attributes, including the "genre_mask" added by LoadGenres"""
+    def __init__(self, genre_dictionary, **booklist):
+        self.genre_dictionary = genre_dictionary
+        self.titles = list(booklist.keys())
+        self.book_ids = {title: book_id for book_id, title in enumerate(self.titles)}
+        self.all_books = (1 << len(self.titles)) - 1
+        self.genre_masks = [booklist[title]["genre_mask"] for title in self.titles]
+        genre_books = [[] for _ in range(len(genre_dictionary))]
+        for book_id, genre_mask in enumerate(self.genre_masks):
+            for genre_id in genre_dictionary.MaskIds(genre_mask):
+                genre_books[genre_id].append(book_id)
+        self.genre_bitmaps = [IdsBitmap(book_ids, len(self.titles)) for book_ids in genre_books]
+        #Numeric attributes stored as columns indexed by book id
+        self.columns = {
+            "rating": array("d", (booklist[title]["rating"] for title in self.titles)),
+            "release_date": array("i", (booklist[title]["release_date"] for title in self.titles)),
+            "length": array("i", (booklist[title]["length"] for title in self.titles)),
+            "series_length": array("i", (booklist[title]["series_length"] for title in self.titles)),
+            "num_books": array("i", (booklist[title]["num_books"] for title in self.titles)),
+        }
+        #Each column's values in ascending order with the matching book ids, for range lookups by binary search
+        self.sorted_columns = {}
+        for field, column in self.columns.items():
+            order = sorted(range(len(column)), key = lambda book_id: column[book_id])
+            self.sorted_columns[field] = (array(column.typecode, (column[book_id] for book_id in order)), array("i", order))
+        self.bucket_bitmaps = {} #(column name, bucket width) -> bucket bitmaps, filled in by BucketBitmaps
+        for field, width in FACET_BUCKETS.items(): #Built up front so the first facet refresh doesn't pay for them
+            self.BucketBitmaps(field, width)
+        self.booklist = booklist #Kept to build the text index on first use
+        self.text_index_cache = None
+        #Secondary indexes listing the ids of the books sharing an author or shared universe
+        self.group_indexes = {"author": {}, "shared_universe": {}}
+        for field, group_index in self.group_indexes.items():
+            for book_id, title in enumerate(self.titles):
+                if booklist[title][field]:
+                    group_index.setdefault(booklist[title][field], []).append(book_id)
+        self.group_keys = {field: [booklist[title][field] for title in self.titles] for field in self.group_indexes}
+
+    #Text index over the books, built the first time a keyword search needs it
+    @property
+    def text_index(self):
+        if self.text_index_cache is None:
+            from TextIndex import TextIndex
+            self.text_index_cache = TextIndex(self.titles, **self.booklist)
+        return self.text_index_cache
+
+    """Finds books in every one of the genres (bitmap AND).
+
+    Args:   genre_ids (iterable): Ids of the required genres
+            bitmap (int or None): Bitmap of candidate books to narrow (default: all books)
+
+    Returns: int: Bitmap of matching book ids"""
+    def MatchAll(self, genre_ids, bitmap = None):
+        result = self.all_books if bitmap is None else bitmap
+        for genre_id in genre_ids:
+            result &= self.genre_bitmaps[genre_id]
+        return result
+
+    """Finds books in at least one of the genres (bitmap OR).
+
+    Args: genre_ids (iterable): Ids of the accepted genres
+
+    Returns: int: Bitmap of matching book ids"""
+    def MatchAny(self, genre_ids):
+        result = 0
+        for genre_id in genre_ids:
+            result |= self.genre_bitmaps[genre_id]
+        return result
+
+    """Removes books in any of the genres from a bitmap (bitmap ANDNOT).
+
+    Args:   bitmap (int): Bitmap of candidate books
+            genre_ids (iterable): Ids of the excluded genres
+
+    Returns: int: Bitmap of the remaining book ids"""
+    def Exclude(self, bitmap, genre_ids):
+        return bitmap & ~self.MatchAny(genre_ids)
+
+    """Counts the books in a bitmap.
+
+    Args: bitmap (int): Bitmap of book ids
+
+    Returns: int: Number of books in the bitmap"""
+    def Count(self, bitmap):
+        return bitmap.bit_count()
+
+    """Counts how many books would be left by adding each genre to a search, without running the searches.
+
+    Args: bitmap (int): Bitmap of the current results
+
+    Returns: dict: Number of remaining books keyed by genre id, for every genre that would leave at least one book"""
+    def RefinementCounts(self, bitmap):
+        counts = {}
+        for genre_id, genre_bitmap in enumerate(self.genre_bitmaps):
+            count = (bitmap & genre_bitmap).bit_count()
+            if count:
+                counts[genre_id] = count
+        return counts
+
+    """Finds every book with a value in a range using the column's sorted index.
+
+    Args:   field (str): Column name ("rating", "release_date", "length", "series_length", or "num_books")
+            low (int, float, or None): Lowest accepted value (default: no minimum)
+            high (int, float, or None): Highest accepted value (default: no maximum)
+
+    Returns: int: Bitmap of matching book ids"""
+    def RangeBitmap(self, field, low = None, high = None):
+        if low is None and high is None:
+            return self.all_books
+        values, book_ids = self.sorted_columns[field]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        end = len(values) if high is None else bisect.bisect_right(values, high)
+        return IdsBitmap(book_ids[start:end], len(self.titles))
+
+    """Keeps the books of a bitmap with a value in a range, checking only the books in the bitmap.
+
+    Args:   bitmap (int): Bitmap of candidate books
+            field (str): Column name ("rating", "release_date", "length", "series_length", or "num_books")
+            low (int, float, or None): Lowest accepted value (default: no minimum)
+            high (int, float, or None): Highest accepted value (default: no maximum)
+
+    Returns: int: Bitmap of the matching book ids"""
+    def FilterRange(self, bitmap, field, low = None, high = None):
+        column = self.columns[field]
+        kept = [book_id for book_id in self.BookIds(bitmap) if (low is None or column[book_id] >= low) and (high is None or column[book_id] <= high)]
+        return IdsBitmap(kept, len(self.titles))
+
+    """Counts the remaining genres and buckets the numeric attributes of a result set. Every count is a popcount of
+    the results ANDed with a genre bitmap or a bucket bitmap, so the books are never listed one by one.
+
+    Args:   bitmap (int): Bitmap of the current results
+            genre_ids (iterable): Ids of genres already in the search, left out of the genre counts
+            buckets (dict): Bucket width keyed by column name (default: FACET_BUCKETS)
+
+    Returns: dict: "genres" maps genre id to book count, and each column name maps a bucket's lower bound to its book count"""
+    def Facets(self, bitmap, genre_ids = (), buckets = FACET_BUCKETS):
+        selected = set(genre_ids)
+        facets = {"genres": {genre_id: count for genre_id, count in self.RefinementCounts(bitmap).items() if genre_id not in selected}}
+        for field, width in buckets.items():
+            histogram = {}
+            for bucket, bucket_bitmap in self.BucketBitmaps(field, width):
+                count = (bitmap & bucket_bitmap).bit_count()
+                if count:
+                    histogram[bucket] = count
+            facets[field] = histogram
+        return facets
+
+    """Splits a column into buckets of equal width, each with the bitmap of its books. Cached after the first call.
+
+    Args:   field (str): Column name ("rating", "release_date", "length", "series_length", or "num_books")
+            width (int or float): Bucket width
+
+    Returns: list: (bucket lower bound, bitmap) tuples in ascending order"""
+    def BucketBitmaps(self, field, width):
+        if (field, width) not in self.bucket_bitmaps:
+            bucket_books = {}
+            for book_id, value in enumerate(self.columns[field]):
+                bucket_books.setdefault(math.floor(value / width) * width, []).append(book_id)
+            self.bucket_bitmaps[(field, width)] = [(bucket, IdsBitmap(book_ids, len(self.titles))) for bucket, book_ids in sorted(bucket_books.items())]
+        return self.bucket_bitmaps[(field, width)]
+
+    """Finds the other books by the same author or in the same shared universe as a book.
+
+    Args:   title (str): Title of the book
+            field (str): "author" or "shared_universe"
+
+    Returns: list: Titles of the related books, best rated first"""
+    def RelatedBooks(self, title, field):
+        group_key = self.group_keys[field][self.book_ids[title]]
+        if not group_key:
+            return []
+        related_ids = [book_id for book_id in self.group_indexes[field][group_key] if self.titles[book_id] != title]
+        return [self.titles[book_id] for book_id in sorted(related_ids, key = lambda book_id: -self.columns["rating"][book_id])]
+
+    """Collapses search results into groups of books by the same author or in the same shared universe. Books
+    without a shared universe form a group of their own.
+
+    Args:   titles (iterable): Book titles to group
+            field (str): "author" or "shared_universe"
+
+    Returns: list: (group name, titles) tuples, ordered by the best rating in each group, with each group's titles best rated first"""
+    def GroupResults(self, titles, field):
+        ratings = self.columns["rating"]
+        groups = {}
+        for title in titles:
+            book_id = self.book_ids[title]
+            group_key = self.group_keys[field][book_id]
+            #Ungrouped books are keyed apart from the groups, so a title equal to a group name isn't merged into it.
+            groups.setdefault((group_key,) if group_key else ("", title), []).append(book_id)
+        grouped = []
+        for group_key, book_ids in groups.items():
+            book_ids.sort(key = lambda book_id: -ratings[book_id])
+            grouped.append((group_key[-1], [self.titles[book_id] for book_id in book_ids]))
+        grouped.sort(key = lambda group: -ratings[self.book_ids[group[1][0]]])
+        return grouped
+
+    """Lists the ids of the books in a bitmap.
+
+    Args: bitmap (int): Bitmap of book ids
+
+    Returns: list: Book ids in ascending order"""
+    def BookIds(self, bitmap):
+        book_ids = []
+        #Converted to bytes once and scanned a byte at a time, skipping empty bytes
+        for byte_index, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")):
+            if byte:
+                first_id = byte_index << 3
+                book_ids.extend([first_id + bit for bit in BYTE_BITS[byte]])
+        return book_ids
+
+    """Lists the titles of the books in a bitmap.
+
+    Args: bitmap (int): Bitmap of book ids
+
+    Returns: list: Book titles in database order"""
+    def Titles(self, bitmap):
+        return [self.titles[book_id] for book_id in self.BookIds(bitmap)]
+
+    """Builds a bitmap from a list of titles.
+
+    Args: titles (iterable): Book titles in the database
+
+    Returns: int: Bitmap of the books' ids"""
+    def Bitmap(self, titles):
+        return IdsBitmap((self.book_ids[title] for title in titles), len(self.titles))
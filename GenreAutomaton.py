@@ -0,0 +1,196 @@
+#Minimized acyclic automaton (DAWG) of the genres, compiled from a GenreTree into a flat binary file and searched
+#directly over a memory map of that file, so the genre trie does not have to be rebuilt on every start.
+#
+#File layout (little-endian):
+#- header: magic b"GDWG", version, node count, edge count, root node, hash of the genres (see VocabularyHash)
+#- nodes: first edge, edge count, end-of-genre flag, number of genres at or below the node
+#- edges, sorted by letter within each node: letter code point, target node, number of genres ordered before
+#  the target among the node's genres (used to compute genre ids while walking the automaton)
+import hashlib
+import mmap
+import os
+import struct
+
+MAGIC = b"GDWG"
+VERSION = 2
+HEADER = struct.Struct("<4sIIII16s")
+NODE = struct.Struct("<IHBxI")
+EDGE = struct.Struct("<III")
+
+"""Hashes a list of genres, so a loaded automaton can be checked against the genres in the database.
+
+Args: genres (iterable): Genres in id order
+
+Returns: bytes: 16-byte hash of the genres"""
+def VocabularyHash(genres):
+    return hashlib.blake2b("\n".join(genres).encode(), digest_size = 16).digest()
+
+"""Compiles a genre trie into a minimized automaton file. Identical subtrees, such as shared suffixes, are merged into one node.
+Genre ids are recomputed as each genre's alphabetical rank, so the trie's ids must have been assigned in alphabetical order.
+The file is written under a temporary name and then renamed over path, so processes that already have the old file
+mapped keep reading it unchanged.
+
+Args:   genre_tree (GenreTree): Trie containing all unique genres in the database
+        path (str): File to write the automaton to
+
+Returns: None"""
+def CompileAutomaton(genre_tree, path):
+    nodes = [] #(is_end, word_count, [(letter, target, words_before)])
+    registry = {} #Node signature -> node index, used to merge identical subtrees
+    genres = [] #Genres in alphabetical order, hashed into the header
+
+    def Compile(letter_node, prefix):
+        if letter_node.isEnd:
+            if letter_node.genre_id is not None and letter_node.genre_id != len(genres):
+                raise ValueError("Genre ids must be assigned in alphabetical order to compile the automaton.")
+            genres.append(prefix)
+        edges = []
+        word_count = 1 if letter_node.isEnd else 0
+        for letter in sorted(letter_node.children):
+            target = Compile(letter_node.children[letter], prefix + letter)
+            edges.append((letter, target, word_count))
+            word_count += nodes[target][1]
+        signature = (letter_node.isEnd, tuple((letter, target) for letter, target, _ in edges))
+        if signature not in registry:
+            registry[signature] = len(nodes)
+            nodes.append((letter_node.isEnd, word_count, edges))
+        return registry[signature]
+
+    root = Compile(genre_tree.root, "")
+    edge_count = sum(len(edges) for _, _, edges in nodes)
+    buffer = bytearray(HEADER.size + NODE.size * len(nodes) + EDGE.size * edge_count)
+    HEADER.pack_into(buffer, 0, MAGIC, VERSION, len(nodes), edge_count, root, VocabularyHash(genres))
+    edge_index = 0
+    edge_offset = HEADER.size + NODE.size * len(nodes)
+    for node_index, (is_end, word_count, edges) in enumerate(nodes):
+        NODE.pack_into(buffer, HEADER.size + NODE.size * node_index, edge_index, len(edges), is_end, word_count)
+        for letter, target, words_before in edges:
+            EDGE.pack_into(buffer, edge_offset + EDGE.size * edge_index, ord(letter), target, words_before)
+            edge_index += 1
+    import tempfile #Only needed when compiling, and slow to import
+    file_descriptor, temporary_path = tempfile.mkstemp(dir = os.path.dirname(os.path.abspath(path)), prefix = ".genres-", suffix = ".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as automaton_file:
+            automaton_file.write(buffer)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+#Read-only genre automaton searched directly over its memory-mapped file. Offers the same searches as GenreTree.
+class GenreAutomaton:
+    """Maps a compiled automaton file into memory.
+
+    Args: path (str): File written by CompileAutomaton"""
+    def __init__(self, path):
+        with open(path, "rb") as automaton_file:
+            self.buffer = mmap.mmap(automaton_file.fileno(), 0, access = mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a genre automaton file.")
+        magic, version, self.node_count, self.edge_count, self.root, self.vocabulary = HEADER.unpack_from(self.buffer, 0)
+        self.edge_offset = HEADER.size + NODE.size * self.node_count
+        if magic != MAGIC or version != VERSION or len(self.buffer) != self.edge_offset + EDGE.size * self.edge_count:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a genre automaton file of version {VERSION}.")
+
+    """Reads a node from the buffer.
+
+    Args: node (int): Index of the node
+
+    Returns: tuple: First edge, edge count, end-of-genre flag, and number of genres at or below the node"""
+    def Node(self, node):
+        return NODE.unpack_from(self.buffer, HEADER.size + NODE.size * node)
+
+    """Reads an edge from the buffer.
+
+    Args: edge (int): Index of the edge
+
+    Returns: tuple: Letter code point, target node, and number of genres ordered before the target"""
+    def Edge(self, edge):
+        return EDGE.unpack_from(self.buffer, self.edge_offset + EDGE.size * edge)
+
+    """Follows the edge for a letter out of a node, using a binary search over the node's sorted edges.
+
+    Args:   node (int): Index of the node
+            letter (str): Letter to follow
+
+    Returns: tuple or None: Target node and number of genres ordered before it, or None if there is no such edge"""
+    def FindChild(self, node, letter):
+        first_edge, edge_count, _, _ = self.Node(node)
+        code = ord(letter)
+        low, high = first_edge, first_edge + edge_count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            edge_code, target, words_before = self.Edge(middle)
+            if edge_code == code:
+                return target, words_before
+            if edge_code < code:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    """Finds the id of an exact genre.
+
+    Args: genre (str): Genre to look up
+
+    Returns: int or None: Alphabetical rank of the genre, matching its GenreDictionary id, or None if the genre is not in the automaton"""
+    def GetId(self, genre):
+        node = self.root
+        genre_id = 0
+        for letter in genre:
+            child = self.FindChild(node, letter)
+            if child is None:
+                return None
+            node, words_before = child
+            genre_id += words_before
+        return genre_id if self.Node(node)[2] else None
+
+    """Finds genres matching or starting with user's input. Matches GenreTree.SearchTree.
+
+    Args: search_term (str): User input for search
+
+    returns: list or False: List of genres matching user input or False if none found"""
+    def SearchTree(self, search_term):
+        node = self.root
+        for letter in search_term:
+            child = self.FindChild(node, letter)
+            if child is None:
+                return False
+            node = child[0]
+        if self.Node(node)[2]: #Exact match found
+            return [search_term]
+        return self.ListGenres(node, search_term, [])
+
+    """Builds a sorted list of genres starting with prefix. Matches GenreTree.ListGenres, stopping at the first complete genre on each path.
+
+    Args:   node (int): Index of the node the prefix leads to
+            prefix (str): Current genre prefix
+            genre_list (list): Accumulating of matching genres
+
+    Returns: list: Sorted list of matching genres"""
+    def ListGenres(self, node, prefix, genre_list):
+        first_edge, edge_count, _, _ = self.Node(node)
+        for edge in range(first_edge, first_edge + edge_count):
+            code, target, _ = self.Edge(edge)
+            if self.Node(target)[2]:
+                genre_list.append(prefix + chr(code))
+            else:
+                self.ListGenres(target, prefix + chr(code), genre_list)
+        genre_list.sort()
+        return genre_list
+
+    """Lists the genres offered to the user. Matches GenreTree.AllGenres.
+
+    Returns: list: Sorted list of genres"""
+    def AllGenres(self):
+        return self.ListGenres(self.root, "", [])
+
+    #Unmaps the automaton file
+    def Close(self):
+        self.buffer.close()
+
+    #Number of genres in the automaton
+    def __len__(self):
+        return self.Node(self.root)[3]
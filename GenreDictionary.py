@@ -0,0 +1,71 @@
+#Genre dictionary, interning each distinct genre as a small integer id
+class GenreDictionary:
+    #Initializes an empty dictionary
+    def __init__(self):
+        self.genre_ids = {}
+        self.genre_names = []
+
+    """Adds a genre to the dictionary if it is not already present.
+
+    Args: genre (str): Genre to be added
+
+    Returns: int: Id of the genre"""
+    def AddGenre(self, genre):
+        if genre not in self.genre_ids:
+            self.genre_ids[genre] = len(self.genre_names)
+            self.genre_names.append(genre)
+        return self.genre_ids[genre]
+
+    """Looks up the id of a genre.
+
+    Args: genre (str): Genre to look up
+
+    Returns: int or None: Id of the genre or None if it is not in the dictionary"""
+    def GetId(self, genre):
+        return self.genre_ids.get(genre)
+
+    """Looks up the name of a genre id.
+
+    Args: genre_id (int): Id to look up
+
+    Returns: str: Name of the genre"""
+    def GetName(self, genre_id):
+        return self.genre_names[genre_id]
+
+    """Encodes a list of genres as a bitmask with one bit per genre id. Unknown genres are ignored.
+
+    Args: genres (iterable): Genre names to encode
+
+    Returns: int: Bitmask of the genres' ids"""
+    def GenreMask(self, genres):
+        mask = 0
+        for genre in genres:
+            genre_id = self.genre_ids.get(genre)
+            if genre_id is not None:
+                mask |= 1 << genre_id
+        return mask
+
+    """Decodes a bitmask back into genre ids.
+
+    Args: mask (int): Bitmask of genre ids
+
+    Returns: list: Genre ids set in the mask, in ascending order"""
+    def MaskIds(self, mask):
+        genre_ids = []
+        while mask:
+            lowest_bit = mask & -mask
+            genre_ids.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return genre_ids
+
+    """Decodes a bitmask back into genre names.
+
+    Args: mask (int): Bitmask of genre ids
+
+    Returns: list: Genre names set in the mask, in id order"""
+    def MaskGenres(self, mask):
+        return [self.genre_names[genre_id] for genre_id in self.MaskIds(mask)]
+
+    #Number of distinct genres in the dictionary
+    def __len__(self):
+        return len(self.genre_names)
@@ -4,6 +4,7 @@ class LetterNode:
         self.letter = letter
         self.children = {}
         self.isEnd = False
+        self.genre_id = None #Genre id stored on terminal nodes
 
 #Trie for storing and searching genres efficiently
 class GenreTree:
@@ -13,14 +14,29 @@ class GenreTree:
 
     """Inserts a new genre into the trie
     
-    Args: genre (str): Genre to be added"""
-    def AddWord(self, genre):
+    Args:   genre (str): Genre to be added
+            genre_id (int or None): Id of the genre in the genre dictionary"""
+    def AddWord(self, genre, genre_id = None):
         current_node = self.root
         for letter in genre:
             if letter not in current_node.children.keys():
                 current_node.children[letter] = LetterNode(letter)
             current_node = current_node.children[letter]
         current_node.isEnd = True #Marks the end of the genre
+        current_node.genre_id = genre_id
+
+    """Finds the id of an exact genre.
+
+    Args: genre (str): Genre to look up
+
+    Returns: int or None: Id stored on the genre's terminal node or None if the genre is not in the trie"""
+    def GetId(self, genre):
+        current_node = self.root
+        for letter in genre:
+            if letter not in current_node.children:
+                return None
+            current_node = current_node.children[letter]
+        return current_node.genre_id if current_node.isEnd else None
 
     """Finds genres matching or starting with user's input.
     
@@ -52,4 +68,10 @@ class GenreTree:
             else:
                 self.ListGenres(letter.children, prefix + letter.letter, genre_list) #Recursively collect genres
         genre_list.sort()
-        return genre_list
\ No newline at end of file
+        return genre_list
+
+    """Lists the genres offered to the user.
+
+    Returns: list: Sorted list of genres"""
+    def AllGenres(self):
+        return self.ListGenres(self.root.children, "", [])
\ No newline at end of file
@@ -0,0 +1,105 @@
+#Configurable ranking of search results. A formula weighs several scores, each scaled from 0 to 1. The scores
+#that don't depend on the search are combined column by column over the whole database once per ranker, so ranking
+#a search only adds the genre match and picks the top results with a partial sort.
+from array import array
+import heapq
+import math
+
+#Scores a ranking formula can weigh
+COMPONENTS = ["rating", "recency", "length_fit", "genre_match", "num_books"]
+
+#Ranking formula with a weight for each score
+class RankingFormula:
+    """Creates a formula.
+
+    Args:   weights (dict): Weight keyed by score name: "rating" (Goodreads rating), "recency" (release date),
+                "length_fit" (closeness to target_length), "genre_match" (share of the book's own genres that were
+                searched, so books centered on the searched genres rank above books that only touch on them), or
+                "num_books" (number of books in the series)
+            target_length (int or None): Preferred length in pages for "length_fit"
+            length_field (str): Column compared with target_length, "length" or "series_length" (default: "length")
+            length_scale (int): Distance from target_length in pages at which "length_fit" drops to 0 (default: 500)"""
+    def __init__(self, weights, target_length = None, length_field = "length", length_scale = 500):
+        for component in weights:
+            if component not in COMPONENTS:
+                raise ValueError(f"Unknown ranking score {component}. The available scores are: {', '.join(COMPONENTS)}.")
+        if length_field not in ["length", "series_length"]:
+            raise ValueError("length_field must be length or series_length.")
+        self.weights = dict(weights)
+        self.target_length = target_length
+        self.length_field = length_field
+        self.length_scale = length_scale
+
+#Built-in formulas, selectable by name
+RANKING_FORMULAS = {
+    "rating": RankingFormula({"rating": 1.0}),
+    "balanced": RankingFormula({"rating": 1.0, "recency": 0.2, "genre_match": 0.3, "num_books": 0.1}),
+    "recent": RankingFormula({"rating": 0.5, "recency": 1.0}),
+    "standalone": RankingFormula({"rating": 1.0, "num_books": -0.5, "length_fit": 0.3}, target_length = 350),
+}
+
+#Ranks books of a BookIndex with one formula
+class Ranker:
+    """Computes the scores that don't depend on the search for every book.
+
+    Args:   book_index (BookIndex): Index of the books in the database
+            formula (RankingFormula): Formula to rank with"""
+    def __init__(self, book_index, formula):
+        self.book_index = book_index
+        self.formula = formula
+        columns = book_index.columns
+        num_books = len(book_index.titles)
+        static_scores = [0.0] * num_books
+        for component, weight in formula.weights.items():
+            if weight == 0 or component == "genre_match":
+                continue
+            if component == "rating":
+                scores = [rating / 5 for rating in columns["rating"]]
+            elif component == "recency":
+                oldest, newest = min(columns["release_date"], default = 0), max(columns["release_date"], default = 0)
+                span = (newest - oldest) or 1
+                scores = [(year - oldest) / span for year in columns["release_date"]]
+            elif component == "length_fit":
+                if formula.target_length is None:
+                    continue
+                scores = [max(0.0, 1 - abs(length - formula.target_length) / formula.length_scale) for length in columns[formula.length_field]]
+            else:
+                most_books = math.log1p(max(columns["num_books"], default = 1))
+                scores = [math.log1p(count) / most_books for count in columns["num_books"]]
+            static_scores = [total + weight * score for total, score in zip(static_scores, scores)]
+        self.static_scores = array("d", static_scores)
+
+    """Scores a set of books.
+
+    Args:   book_ids (list): Ids of the books to score
+            genre_ids (iterable): Ids of the searched genres, used for "genre_match"
+
+    Returns: list: Score of each book, in the order of book_ids"""
+    def Scores(self, book_ids, genre_ids = ()):
+        static_scores = self.static_scores
+        scores = [static_scores[book_id] for book_id in book_ids]
+        weight = self.formula.weights.get("genre_match", 0)
+        genre_ids = list(genre_ids)
+        if weight and genre_ids:
+            search_mask = 0
+            for genre_id in genre_ids:
+                search_mask |= 1 << genre_id
+            genre_masks = self.book_index.genre_masks
+            scores = [score + weight * (genre_masks[book_id] & search_mask).bit_count() / (genre_masks[book_id].bit_count() or 1) for score, book_id in zip(scores, book_ids)]
+        return scores
+
+    """Finds the best ranked books in a bitmap without sorting all of them.
+
+    Args:   bitmap (int): Bitmap of candidate books
+            limit (int or None): Number of books to return (default: all of them, fully sorted)
+            genre_ids (iterable): Ids of the searched genres, used for "genre_match"
+
+    Returns: list: Book titles, best ranked first"""
+    def TopBooks(self, bitmap, limit = None, genre_ids = ()):
+        book_ids = self.book_index.BookIds(bitmap)
+        ranked = zip(self.Scores(book_ids, genre_ids), book_ids)
+        if limit is None:
+            best = sorted(ranked, key = lambda result: -result[0])
+        else:
+            best = heapq.nlargest(limit, ranked, key = lambda result: result[0])
+        return [self.book_index.titles[book_id] for _, book_id in best]
@@ -0,0 +1,123 @@
+#Reading-budget planner. Picks the books or whole series that fit in a page budget with the highest total rating (or
+#ranking score), using a 0/1 knapsack over the filtered candidates. Candidates that can never be in the best plan are
+#pruned first, and page counts are only scaled down (rounding each book up, so a plan never goes over the budget) when
+#the candidates times the capacity steps would exceed max_cells, so small searches are solved exactly. Pages left over
+#by the rounding are then filled with the remaining books giving the most value per page.
+import argparse
+import heapq
+import math
+
+#Page column read for each planning mode
+PLAN_MODES = {"first_book": "length", "series": "series_length"}
+
+"""Drops candidates that can't be in the best plan. At most capacity // weight books of one weight fit in the
+budget, so only that many of the best valued books of each weight are kept; the result is the same.
+
+Args:   weights (list): Weight of each candidate in capacity steps
+        values (list): Value of each candidate
+        capacity (int): Number of capacity steps in the budget
+
+Returns: list: Indexes of the kept candidates, in ascending order"""
+def PruneCandidates(weights, values, capacity):
+    weight_classes = {}
+    for index, weight in enumerate(weights):
+        if weight <= capacity and values[index] > 0:
+            weight_classes.setdefault(weight, []).append(index)
+    kept = []
+    for weight, indexes in weight_classes.items():
+        #Books without pages all fit.
+        kept.extend(indexes if weight == 0 else heapq.nlargest(capacity // weight, indexes, key = lambda index: values[index]))
+    return sorted(kept)
+
+"""Adds books to a plan in order while they fit in the budget.
+
+Args:   planned_ids (set): Ids of the books already planned, added to in place
+        ordered (list): (value, book id) tuples in the order to try them
+        pages (array): Pages of each book
+        budget (int): Number of pages available
+
+Returns: set: Ids of the planned books"""
+def FillBudget(planned_ids, ordered, pages, budget):
+    used_pages = sum(pages[book_id] for book_id in planned_ids)
+    for value, book_id in ordered:
+        if value > 0 and book_id not in planned_ids and used_pages + pages[book_id] <= budget:
+            planned_ids.add(book_id)
+            used_pages += pages[book_id]
+    return planned_ids
+
+"""Plans what to read within a page budget.
+
+Args:   book_index (BookIndex): Index of the books in the database
+        budget (int): Number of pages available
+        genre_ids (iterable): Ids of genres every planned book must have
+        mode (str): "first_book" to count only the first book of each series, or "series" to read whole series (default: "first_book")
+        bitmap (int or None): Bitmap of candidate books, e.g. from a SearchSession (default: all books)
+        ranker (Ranker or None): Ranker whose scores are maximized instead of the Goodreads rating
+        max_cells (int): Most knapsack cells (candidates times capacity steps) before page counts are scaled down (default: 1000000)
+
+Returns: tuple: Planned titles, highest value first, and their total number of pages"""
+def PlanReading(book_index, budget, genre_ids = (), mode = "first_book", bitmap = None, ranker = None, max_cells = 1000000):
+    if mode not in PLAN_MODES:
+        raise ValueError(f"Unknown planning mode {mode}. The available modes are: {', '.join(PLAN_MODES)}.")
+    pages = book_index.columns[PLAN_MODES[mode]]
+    candidates = [book_id for book_id in book_index.BookIds(book_index.MatchAll(genre_ids, bitmap)) if pages[book_id] <= budget]
+    if ranker is not None:
+        candidate_values = ranker.Scores(candidates, genre_ids)
+    else:
+        candidate_values = [book_index.columns["rating"][book_id] for book_id in candidates]
+    book_ids, values = candidates, candidate_values
+    #Finds the smallest number of pages per capacity step whose pruned candidates fit in max_cells.
+    scale = 1
+    while True:
+        capacity = budget // scale
+        weights = [math.ceil(pages[book_id] / scale) for book_id in book_ids]
+        kept = PruneCandidates(weights, values, capacity)
+        if len(kept) * (capacity + 1) <= max_cells or capacity <= 1:
+            break
+        scale = max(scale + 1, scale * 5 // 4)
+    book_ids = [book_ids[index] for index in kept]
+    values = [values[index] for index in kept]
+    weights = [weights[index] for index in kept]
+    best = [0.0] * (capacity + 1) #Best total value for each used capacity
+    choices = []
+    for weight, value in zip(weights, values):
+        kept_totals, added = best[weight:], [total + value for total in best[:capacity + 1 - weight]]
+        choices.append(bytes(weight) + bytes(new > old for new, old in zip(added, kept_totals)))
+        best = best[:weight] + [max(new, old) for new, old in zip(added, kept_totals)]
+    planned = []
+    remaining = capacity
+    for index in range(len(book_ids) - 1, -1, -1):
+        if choices[index][remaining]:
+            planned.append(index)
+            remaining -= weights[index]
+    planned_ids = {book_ids[index] for index in planned}
+    value_of = dict(zip(candidates, candidate_values))
+    if scale > 1:
+        #Rounding pages up leaves part of the budget unused, so the plan is topped up with the books giving the most
+        #value per page, and a plan built only that way is used instead if it scores higher.
+        by_density = sorted(zip(candidate_values, candidates), key = lambda candidate: -candidate[0] / max(1, pages[candidate[1]]))
+        greedy_ids = FillBudget(set(), by_density, pages, budget)
+        planned_ids = FillBudget(planned_ids, by_density, pages, budget)
+        if sum(value_of[book_id] for book_id in greedy_ids) > sum(value_of[book_id] for book_id in planned_ids):
+            planned_ids = greedy_ids
+    return [book_index.titles[book_id] for book_id in sorted(planned_ids, key = lambda book_id: -value_of[book_id])], sum(pages[book_id] for book_id in planned_ids)
+
+if __name__ == "__main__":
+    from booksearch import Catalog
+    from Ranking import Ranker, RANKING_FORMULAS
+    parser = argparse.ArgumentParser(description = "Plan the best rated books or series to read within a page budget.")
+    parser.add_argument("budget", type = int, help = "number of pages available")
+    parser.add_argument("--genre", action = "append", default = [], help = "genre every planned book must have (can be repeated)")
+    parser.add_argument("--mode", choices = sorted(PLAN_MODES), default = "first_book", help = "count only first books or whole series")
+    parser.add_argument("--ranking", choices = sorted(RANKING_FORMULAS), help = "maximize a ranking formula instead of the rating")
+    arguments = parser.parse_args()
+    catalog = Catalog(background = False)
+    genre_dictionary, book_index = catalog.GetGenreDictionary(), catalog.GetBookIndex()
+    genre_ids = [genre_dictionary.GetId(genre.lower()) for genre in arguments.genre]
+    if None in genre_ids:
+        parser.error("unknown genre. The available genres are: " + ", ".join(genre_dictionary.genre_names))
+    ranker = Ranker(book_index, RANKING_FORMULAS[arguments.ranking]) if arguments.ranking else None
+    titles, total_pages = PlanReading(book_index, arguments.budget, genre_ids, arguments.mode, ranker = ranker)
+    for title in titles:
+        print(title)
+    print(f"Total: {total_pages} of {arguments.budget} pages")
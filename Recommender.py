@@ -0,0 +1,188 @@
+#Item-to-item collaborative filtering ("readers who liked X also liked"). Reader events are loaded into sparse
+#compressed-row (CSR) matrices, and each book's most similar books are precomputed in chunks of rows spread over
+#worker processes, so a recommendation is a single lookup.
+#
+#Events are read from a CSV file with the columns user, book, and rating. book is a title from the book database and
+#rating is optional; events without one count as a read with a weight of 1.
+from array import array
+import argparse
+import csv
+import heapq
+import math
+import multiprocessing
+
+#Reader/book interactions stored both by reader and by book in CSR form
+class InteractionMatrix:
+    """Builds the matrices from reader events stored in parallel arrays. A reader's later event for a book replaces
+    an earlier one.
+
+    Args:   num_books (int): Number of books in the database
+            num_users (int): Number of readers
+            event_users (array): Reader id of each event
+            event_books (array): Book id of each event
+            event_weights (array): Weight of each event"""
+    def __init__(self, num_books, num_users, event_users, event_books, event_weights):
+        self.num_books = num_books
+        self.num_users = num_users
+        #Counting sort of the events by reader, keeping each reader's events in the order they were read
+        event_pointers = array("q", bytes(8 * (num_users + 1)))
+        for user_id in event_users:
+            event_pointers[user_id + 1] += 1
+        for user_id in range(num_users):
+            event_pointers[user_id + 1] += event_pointers[user_id]
+        next_slot = array("q", event_pointers[:-1])
+        event_order = array("q", bytes(8 * len(event_users)))
+        for event, user_id in enumerate(event_users):
+            event_order[next_slot[user_id]] = event
+            next_slot[user_id] += 1
+        #Row u of the reader matrix is user_indices/user_weights[user_pointers[u]:user_pointers[u + 1]]
+        self.user_pointers = array("q", [0])
+        self.user_indices = array("i")
+        self.user_weights = array("d")
+        book_counts = [0] * num_books
+        for user_id in range(num_users):
+            books = {} #Only one reader's books are held in a dictionary at a time.
+            for position in range(event_pointers[user_id], event_pointers[user_id + 1]):
+                event = event_order[position]
+                books[event_books[event]] = event_weights[event]
+            for book_id in sorted(books):
+                self.user_indices.append(book_id)
+                self.user_weights.append(books[book_id])
+                book_counts[book_id] += 1
+            self.user_pointers.append(len(self.user_indices))
+        del event_pointers, event_order, next_slot
+        #Transpose into the book matrix, whose rows list the readers of each book
+        self.book_pointers = array("q", [0])
+        for count in book_counts:
+            self.book_pointers.append(self.book_pointers[-1] + count)
+        self.book_indices = array("i", bytes(4 * len(self.user_indices)))
+        self.book_weights = array("d", bytes(8 * len(self.user_indices)))
+        next_slot = array("q", self.book_pointers[:-1])
+        for user_id in range(self.num_users):
+            for position in range(self.user_pointers[user_id], self.user_pointers[user_id + 1]):
+                book_id = self.user_indices[position]
+                self.book_indices[next_slot[book_id]] = user_id
+                self.book_weights[next_slot[book_id]] = self.user_weights[position]
+                next_slot[book_id] += 1
+        self.book_norms = array("d", (math.sqrt(sum(weight * weight for weight in self.book_weights[self.book_pointers[book_id]:self.book_pointers[book_id + 1]])) for book_id in range(num_books)))
+
+"""Reads reader events from a CSV file, streaming them into compact arrays instead of keeping a dictionary per
+reader. Events for books not in the database are skipped.
+
+Args:   path (str): CSV file with user, book, and optional rating columns
+        book_index (BookIndex): Index of the books in the database
+
+Returns: InteractionMatrix: Interactions keyed by reader and book id"""
+def LoadInteractions(path, book_index):
+    user_ids = {}
+    event_users, event_books, event_weights = array("i"), array("i"), array("d")
+    with open(path, newline = "") as event_file:
+        for event in csv.DictReader(event_file):
+            book_id = book_index.book_ids.get(event["book"])
+            if book_id is None:
+                continue
+            rating = event.get("rating")
+            event_users.append(user_ids.setdefault(event["user"], len(user_ids)))
+            event_books.append(book_id)
+            event_weights.append(float(rating) if rating else 1.0)
+    return InteractionMatrix(len(book_index.titles), len(user_ids), event_users, event_books, event_weights)
+
+#Matrix shared with the worker processes, set once per worker by ShareMatrix
+worker_matrix = None
+
+"""Stores the interaction matrix for the rows computed in this process.
+
+Args: matrix (InteractionMatrix): Interactions to compute similarities from
+
+Returns: None"""
+def ShareMatrix(matrix):
+    global worker_matrix
+    worker_matrix = matrix
+
+"""Computes the most similar books for a chunk of books. Only one row of co-occurrences is held at a time, so memory
+stays bounded by the number of books rather than the number of book pairs.
+
+Args: task (tuple): First book id, book id after the last, and number of neighbors to keep
+
+Returns: list: For each book in the chunk, its (similarity, book id) neighbors, most similar first"""
+def ComputeRows(task):
+    start, end, neighbors = task
+    matrix = worker_matrix
+    rows = []
+    for book_id in range(start, end):
+        co_occurrences = {}
+        for position in range(matrix.book_pointers[book_id], matrix.book_pointers[book_id + 1]):
+            user_id = matrix.book_indices[position]
+            weight = matrix.book_weights[position]
+            for user_position in range(matrix.user_pointers[user_id], matrix.user_pointers[user_id + 1]):
+                other_id = matrix.user_indices[user_position]
+                if other_id != book_id:
+                    co_occurrences[other_id] = co_occurrences.get(other_id, 0) + weight * matrix.user_weights[user_position]
+        norm = matrix.book_norms[book_id]
+        #Books whose only ratings are 0 have no direction to compare, so they get no neighbors and are no one's neighbor.
+        similarities = ((total / (norm * matrix.book_norms[other_id]), other_id) for other_id, total in co_occurrences.items() if norm and matrix.book_norms[other_id])
+        rows.append(heapq.nlargest(neighbors, similarities))
+    return rows
+
+#Precomputed cosine similarities between books, keeping each book's top neighbors in CSR form
+class Recommender:
+    """Computes each book's most similar books.
+
+    Args:   book_index (BookIndex): Index of the books in the database
+            matrix (InteractionMatrix): Reader interactions, e.g. from LoadInteractions
+            neighbors (int): Number of similar books kept per book (default: 10)
+            processes (int or None): Worker processes, 1 to compute in this process (default: one per CPU)
+            rows_per_task (int): Books per chunk sent to a worker (default: 256)"""
+    def __init__(self, book_index, matrix, neighbors = 10, processes = None, rows_per_task = 256):
+        self.book_index = book_index
+        tasks = [(start, min(start + rows_per_task, matrix.num_books), neighbors) for start in range(0, matrix.num_books, rows_per_task)]
+        self.neighbor_pointers = array("q", [0])
+        self.neighbor_indices = array("i")
+        self.neighbor_scores = array("d")
+        if processes == 1 or len(tasks) <= 1:
+            ShareMatrix(matrix)
+            self.StoreRows(map(ComputeRows, tasks))
+        else:
+            with multiprocessing.Pool(processes, initializer = ShareMatrix, initargs = (matrix,)) as pool:
+                self.StoreRows(pool.imap(ComputeRows, tasks))
+
+    """Appends computed rows of neighbors to the neighbor arrays.
+
+    Args: chunks (iterable): Lists of rows returned by ComputeRows, in book id order
+
+    Returns: None"""
+    def StoreRows(self, chunks):
+        for rows in chunks:
+            for row in rows:
+                for similarity, other_id in row:
+                    self.neighbor_indices.append(other_id)
+                    self.neighbor_scores.append(similarity)
+                self.neighbor_pointers.append(len(self.neighbor_indices))
+
+    """Finds the books most often liked by readers who liked a book.
+
+    Args:   title (str): Title of the book
+            limit (int or None): Maximum number of books (default: every precomputed neighbor)
+
+    Returns: list: (title, similarity) tuples, most similar first"""
+    def AlsoLiked(self, title, limit = None):
+        book_id = self.book_index.book_ids[title]
+        start, end = self.neighbor_pointers[book_id], self.neighbor_pointers[book_id + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return [(self.book_index.titles[self.neighbor_indices[position]], self.neighbor_scores[position]) for position in range(start, end)]
+
+if __name__ == "__main__":
+    from booksearch import Catalog
+    parser = argparse.ArgumentParser(description = "Show the books liked by readers who liked a book.")
+    parser.add_argument("events", help = "CSV file of reader events with user, book, and rating columns")
+    parser.add_argument("title", help = "title of the book, as listed in the book database")
+    parser.add_argument("--neighbors", type = int, default = 10, help = "number of similar books to show")
+    parser.add_argument("--processes", type = int, default = None, help = "worker processes used to compute similarities")
+    arguments = parser.parse_args()
+    book_index = Catalog(background = False).GetBookIndex()
+    if arguments.title not in book_index.book_ids:
+        parser.error(f"unknown title {arguments.title}. The available titles are: " + ", ".join(book_index.titles))
+    recommender = Recommender(book_index, LoadInteractions(arguments.events, book_index), arguments.neighbors, arguments.processes)
+    for title, similarity in recommender.AlsoLiked(arguments.title):
+        print(f"{title}: {similarity:.3f}")
@@ -0,0 +1,94 @@
+#Interactive search session. Keeps the bitmap of books matching the search so far, so adding a genre or tightening a
+#bound only re-checks those books, while loosening a bound rebuilds the results from the BookIndex.
+class SearchSession:
+    """Starts a session with every book as a candidate.
+
+    Args:   book_index (BookIndex): Index of the books in the database
+            genre_ids (iterable): Ids of genres to start the search with"""
+    def __init__(self, book_index, genre_ids = ()):
+        self.book_index = book_index
+        self.genre_ids = list(genre_ids)
+        self.bounds = {} #Column name -> (low, high)
+        self.keywords = None
+        self.candidates = book_index.MatchAll(self.genre_ids)
+
+    """Adds a genre to the search, narrowing the current results.
+
+    Args: genre_id (int): Id of the genre
+
+    Returns: None"""
+    def AddGenre(self, genre_id):
+        if genre_id not in self.genre_ids:
+            self.genre_ids.append(genre_id)
+            self.candidates = self.book_index.MatchAll([genre_id], self.candidates)
+
+    """Removes a genre from the search, rebuilding the results from the indexes.
+
+    Args: genre_id (int): Id of the genre
+
+    Returns: None"""
+    def RemoveGenre(self, genre_id):
+        if genre_id in self.genre_ids:
+            self.genre_ids.remove(genre_id)
+            self.Recompute()
+
+    """Sets the range of accepted values for a column. A range inside the previous one only re-checks the current
+    results; any other change rebuilds the results from the indexes.
+
+    Args:   field (str): Column name ("rating", "release_date", "length", "series_length", or "num_books")
+            low (int, float, or None): Lowest accepted value (default: no minimum)
+            high (int, float, or None): Highest accepted value (default: no maximum)
+
+    Returns: None"""
+    def SetBound(self, field, low = None, high = None):
+        old_low, old_high = self.bounds.get(field, (None, None))
+        if (low, high) == (old_low, old_high):
+            return
+        if low is None and high is None:
+            del self.bounds[field]
+        else:
+            self.bounds[field] = (low, high)
+        tightened = (old_low is None or (low is not None and low >= old_low)) and (old_high is None or (high is not None and high <= old_high))
+        if tightened:
+            self.candidates = self.book_index.FilterRange(self.candidates, field, low, high)
+        else:
+            self.Recompute()
+
+    """Sets keywords the books must match. Adding keywords to a search without any narrows the current results;
+    changing or removing them rebuilds the results from the indexes.
+
+    Args: keywords (str or None): Words to search for, or None to stop matching keywords
+
+    Returns: None"""
+    def SetKeywords(self, keywords):
+        if keywords == self.keywords:
+            return
+        narrowing = self.keywords is None
+        self.keywords = keywords
+        if narrowing:
+            self.candidates = self.book_index.text_index.Bitmap(keywords, self.candidates)
+        else:
+            self.Recompute()
+
+    """Rebuilds the results from the indexes, starting from the genre bitmaps.
+
+    Returns: None"""
+    def Recompute(self):
+        candidates = self.book_index.MatchAll(self.genre_ids)
+        for field, (low, high) in self.bounds.items():
+            candidates &= self.book_index.RangeBitmap(field, low, high)
+        if self.keywords is not None:
+            candidates = self.book_index.text_index.Bitmap(self.keywords, candidates)
+        self.candidates = candidates
+
+    """Counts the books matching the search so far.
+
+    Returns: int: Number of matching books"""
+    def Count(self):
+        return self.book_index.Count(self.candidates)
+
+    """Lists the books matching the search so far.
+
+    Returns: list: Book titles in database order"""
+    def Titles(self):
+        return self.book_index.Titles(self.candidates)
@@ -0,0 +1,108 @@
+from BookIndex import IdsBitmap
+import bisect
+import math
+import re
+
+#Book attributes searched by the text index
+TEXT_FIELDS = ["first_book", "series_name", "author", "shared_universe", "notes"]
+
+"""Splits text into lowercase search terms made of letters and digits in any script, so "Brontë" stays one term.
+Apostrophes are dropped so "Ender's" is indexed as "enders".
+
+Args: text (str): Text to split
+
+Returns: list: Search terms in the order they appear"""
+def Tokenize(text):
+    return re.findall(r"[^\W_]+", text.lower().replace("'", ""))
+
+#Inverted index over the text attributes of the books, ranked with BM25
+class TextIndex:
+    """Builds the index from the book database.
+
+    Args:   titles (list): Book titles in book id order
+            k1 (float): BM25 term frequency saturation (default: 1.2)
+            b (float): BM25 document length normalization (default: 0.75)
+            booklist (dict): Dictionary of books with their attributes"""
+    def __init__(self, titles, k1 = 1.2, b = 0.75, **booklist):
+        term_counts = {} #Term -> {book id: term frequency}
+        book_lengths = []
+        for book_id, title in enumerate(titles):
+            book_length = 0
+            for field in TEXT_FIELDS:
+                if booklist[title][field]:
+                    for term in Tokenize(booklist[title][field]):
+                        term_counts.setdefault(term, {})
+                        term_counts[term][book_id] = term_counts[term].get(book_id, 0) + 1
+                        book_length += 1
+            book_lengths.append(book_length)
+        num_books = self.num_books = len(titles)
+        average_length = sum(book_lengths) / num_books if num_books else 0
+        #Each posting holds the book's full BM25 weight for the term, so a query only has to add them up.
+        self.postings = {}
+        for term, counts in term_counts.items():
+            idf = math.log(1 + (num_books - len(counts) + 0.5) / (len(counts) + 0.5))
+            self.postings[term] = {book_id: idf * count * (k1 + 1) / (count + k1 * (1 - b + b * book_lengths[book_id] / average_length)) for book_id, count in counts.items()}
+        self.terms = sorted(self.postings) #Sorted for prefix lookups by binary search
+
+    """Finds every indexed term starting with a prefix.
+
+    Args: prefix (str): Start of the term
+
+    Returns: list: Matching terms in alphabetical order"""
+    def PrefixTerms(self, prefix):
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\uffff", start)
+        return self.terms[start:end]
+
+    """Scores the books matching every term of a query. The last term also matches longer terms starting with it,
+    so results can be shown while the user is still typing. A book scores the best of its matches for that term, so
+    containing several words with the prefix doesn't rank it above an exact match.
+
+    Args:   query (str): Words to search for
+            bitmap (int or None): Bitmap of candidate books, e.g. from a genre search (default: all books)
+
+    Returns: dict: BM25 score keyed by the id of each matching book"""
+    def Scores(self, query, bitmap = None):
+        query_terms = Tokenize(query)
+        if len(query_terms) == 0:
+            return {}
+        #Read once as bytes so checking a posting against the bitmap doesn't shift the whole int
+        candidates = None if bitmap is None else bitmap.to_bytes((self.num_books + 7) // 8, "little")
+        scores = None
+        for position, query_term in enumerate(query_terms):
+            if position == len(query_terms) - 1:
+                expansions = self.PrefixTerms(query_term)
+            else:
+                expansions = [query_term] if query_term in self.postings else []
+            term_scores = {}
+            for term in expansions:
+                for book_id, weight in self.postings[term].items():
+                    if candidates is None or candidates[book_id >> 3] >> (book_id & 7) & 1:
+                        term_scores[book_id] = max(term_scores.get(book_id, 0), weight)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {book_id: score + term_scores[book_id] for book_id, score in scores.items() if book_id in term_scores}
+            if len(scores) == 0:
+                break
+        return scores
+
+    """Searches the index, ranking the results by BM25 score.
+
+    Args:   query (str): Words to search for
+            bitmap (int or None): Bitmap of candidate books (default: all books)
+            limit (int or None): Maximum number of results (default: no limit)
+
+    Returns: list: (book id, score) tuples, best match first"""
+    def Search(self, query, bitmap = None, limit = None):
+        results = sorted(self.Scores(query, bitmap).items(), key = lambda result: (-result[1], result[0]))
+        return results if limit is None else results[:limit]
+
+    """Finds the books matching a query without ranking them.
+
+    Args:   query (str): Words to search for
+            bitmap (int or None): Bitmap of candidate books (default: all books)
+
+    Returns: int: Bitmap of matching book ids"""
+    def Bitmap(self, query, bitmap = None):
+        return IdsBitmap(self.Scores(query, bitmap), self.num_books)
@@ -4,7 +4,7 @@
 # - series_name (str): Name of series. Empty string for standalone books. "Series" without a defined order of events (can be read in any order) are treated as standalone books in a shared universe.
 # - first_book (str): First book in the series (standalone books are a series of 1)
 # - author (str): Name of the series author(s)
-# - genres (list): List of genres for trie-based search
+# - genres (list): List of genres for trie-based search. booksearch.LoadGenres also adds genre_mask (int), a bitmask of the genres' integer ids, when the program starts.
 # - release_date (int): Publication year of the first book
 # - rating (float): Goodreads rating (0-5)
 # - length (int): Length in pages of first book. Kindle version for standardization when available.
@@ -1,48 +1,229 @@
 #Book search program utilizing a trie for searching genres, various filters to narrow the search, and a quicksort function for sorting matching books by rating.
-from GenreTree import GenreTree
-from books import booklist
+#Only what the first prompt needs is imported here. The search structures and their modules are imported by the
+#functions that build or use them, so they load on the Catalog's background thread while the user types.
+import time
+import_start = time.perf_counter() #Used to report startup latency
+import os
 import random
+import sys
+import_time = time.perf_counter() - import_start
 
 """Runs the book search program, coordinating genre selection, filtering, and display.
 
-Args: booklist (dict): Dictionary of books with their attributes.
+Args:   booklist (dict or None): Dictionary of books with their attributes, or None to load books.booklist on first use.
+        ranking (str or None): Name of a formula in RANKING_FORMULAS to order results by, or None to sort by rating.
+        lazy (bool): Load the database and build the search structures in the background while the user types the first search (default: True)
+        timing (bool): Report the import and first-prompt latency (default: False)
+        query_log (str or None): JSONL file to append each search to, for replaying with replay.py (default: no log)
+        limit (int or None): Number of best results to show (default: all of them)
 
 Returns: None"""
-def main(booklist):
-    genre_tree = BuildTree(**booklist)
+def main(booklist = None, ranking = None, lazy = True, timing = False, query_log = None, limit = None):
+    from SearchSession import SearchSession
+    catalog = Catalog(booklist, ranking, background = lazy)
+    if not lazy:
+        catalog.LoadAll()
+    if timing:
+        print(f"Import: {import_time * 1000:.1f} ms. First prompt: {(time.perf_counter() - import_start) * 1000:.1f} ms after import started.", file = sys.stderr)
     user_continue = True
     while user_continue:
-        genre_list = GenreList(genre_tree)
-        books = BookSearch(genre_list, booklist.keys(), **booklist)
-        sorted_books = FilterOptions(books, **booklist)
-        PrintBooks(sorted_books, **booklist)
+        genre_list = GenreList(catalog)
+        genre_tree, book_index, booklist = catalog.GetGenreTree(), catalog.GetBookIndex(), catalog.GetBooklist()
+        session = SearchSession(book_index, [genre_tree.GetId(genre) for genre in genre_list])
+        sorted_books = FilterOptions(session, catalog.GetRanker(), limit, **booklist)
+        if query_log is not None:
+            LogQuery(query_log, genre_list, session, ranking, limit)
+        group_by = GroupOption() if len(sorted_books) > 1 else None
+        PrintBooks(sorted_books, book_index, group_by, **booklist)
         user_continue = SearchAgain()
 
-"""Builds a trie of genres for the user to search.
+#Book database and search structures, each loaded the first time it is needed. With background loading, all of them
+#are built on a separate thread as soon as the catalog is created, so the user can type while they load.
+class Catalog:
+    """Creates the catalog.
+
+    Args:   booklist (dict or None): Dictionary of books with their attributes, or None to import books.booklist on first use
+            ranking (str or None): Name of a formula in RANKING_FORMULAS, or None for no ranker
+            background (bool): Start loading everything on a background thread (default: True)"""
+    def __init__(self, booklist = None, ranking = None, background = True):
+        import threading
+        self.booklist = booklist
+        self.ranking = ranking
+        self.genre_dictionary = self.genre_tree = self.book_index = None
+        self.rankers = {}
+        self.lock = threading.RLock() #Held while loading, so callers wait for a load already in progress
+        if background:
+            threading.Thread(target = self.LoadAll, daemon = True).start()
+
+    #Loads everything, starting with what the first prompt needs
+    def LoadAll(self):
+        self.GetGenreTree()
+        self.GetBookIndex()
+        self.GetRanker()
+
+    #Returns the book database, importing it on first use
+    def GetBooklist(self):
+        with self.lock:
+            if self.booklist is None:
+                import books
+                self.booklist = books.booklist
+            return self.booklist
+
+    #Returns the genre dictionary, building it on first use
+    def GetGenreDictionary(self):
+        with self.lock:
+            if self.genre_dictionary is None:
+                self.genre_dictionary = LoadGenres(**self.GetBooklist())
+            return self.genre_dictionary
+
+    #Returns the genre automaton or trie, loading it on first use
+    def GetGenreTree(self):
+        with self.lock:
+            if self.genre_tree is None:
+                self.genre_tree = LoadTree(self.GetGenreDictionary())
+            return self.genre_tree
+
+    #Returns the book index, building it on first use
+    def GetBookIndex(self):
+        with self.lock:
+            if self.book_index is None:
+                from BookIndex import BookIndex
+                self.book_index = BookIndex(self.GetGenreDictionary(), **self.GetBooklist())
+            return self.book_index
+
+    """Returns the ranker for a formula, building it on first use.
+
+    Args: ranking (str or None): Name of a formula in RANKING_FORMULAS (default: the catalog's formula)
+
+    Returns: Ranker or None: Ranker for the formula, or None if no formula was chosen"""
+    def GetRanker(self, ranking = None):
+        ranking = self.ranking if ranking is None else ranking
+        if ranking is None:
+            return None
+        with self.lock:
+            if ranking not in self.rankers:
+                from Ranking import Ranker, RANKING_FORMULAS
+                self.rankers[ranking] = Ranker(self.GetBookIndex(), RANKING_FORMULAS[ranking])
+            return self.rankers[ranking]
+
+"""Runs a search without prompting the user, for scripts and replaying query logs.
+
+Args:   catalog (Catalog): Catalog of books to search
+        genres (iterable): Genres every result must have
+        bounds (dict or None): [low, high] range keyed by column name ("rating", "release_date", "length", "series_length", or "num_books"), with None for an open end
+        keywords (str or None): Words every result must match
+        ranking (str or None): Name of a formula in RANKING_FORMULAS, or None to sort by rating
+        limit (int or None): Number of best results to return (default: all of them)
+
+Returns: list: Matching book titles, best first"""
+def RunSearch(catalog, genres = (), bounds = None, keywords = None, ranking = None, limit = None):
+    from SearchSession import SearchSession
+    genre_tree = catalog.GetGenreTree()
+    genre_ids = [genre_tree.GetId(genre) for genre in genres]
+    if None in genre_ids: #A genre that isn't in the database matches no books.
+        return []
+    session = SearchSession(catalog.GetBookIndex(), genre_ids)
+    for field, (low, high) in (bounds or {}).items():
+        session.SetBound(field, low, high)
+    if keywords:
+        session.SetKeywords(keywords)
+    return RankResults(session, catalog.GetRanker(ranking), limit, **catalog.GetBooklist())
+
+"""Appends a search to a query log in the format read by RunSearch and replay.py.
+
+Args:   path (str): JSONL file to append to
+        genre_list (list): Searched genres
+        session (SearchSession): Session holding the search's bounds and keywords
+        ranking (str or None): Name of the ranking formula used, or None for the rating sort
+        limit (int or None): Number of best results shown, or None for all of them
+
+Returns: None"""
+def LogQuery(path, genre_list, session, ranking, limit):
+    import json
+    query = {"genres": genre_list, "bounds": {field: list(bound) for field, bound in session.bounds.items()}, "keywords": session.keywords, "ranking": ranking, "limit": limit}
+    with open(path, "a") as log_file:
+        log_file.write(json.dumps(query) + "\n")
+
+"""Interns every genre in the database as an integer id and stores each book's genres as a bitmask under "genre_mask".
 
 Args: booklist (dict): Dictionary of books with their attributes.
 
-Returns: GenreTree: Trie containing all unique genres in the database."""
-def BuildTree(**booklist):
-    genre_tree = GenreTree()
+Returns: GenreDictionary: Dictionary of all unique genres, with ids assigned in alphabetical order."""
+def LoadGenres(**booklist):
+    from GenreDictionary import GenreDictionary
+    genre_dictionary = GenreDictionary()
     genre_set = set()
     for book in booklist.values():
         for genre in book["genres"]:
             genre_set.add(genre)
-    for genre in genre_set:
-        genre_tree.AddWord(genre)
+    for genre in sorted(genre_set): #Sorted so ids are stable between runs.
+        genre_dictionary.AddGenre(genre)
+    for book in booklist.values():
+        book["genre_mask"] = genre_dictionary.GenreMask(book["genres"])
+    return genre_dictionary
+
+"""Builds a trie of genres for the user to search.
+
+Args: genre_dictionary (GenreDictionary): Dictionary of all unique genres in the database.
+
+Returns: GenreTree: Trie containing all unique genres in the database, with each genre's id on its terminal node."""
+def BuildTree(genre_dictionary):
+    from GenreTree import GenreTree
+    genre_tree = GenreTree()
+    for genre_id, genre in enumerate(genre_dictionary.genre_names):
+        genre_tree.AddWord(genre, genre_id)
     return genre_tree
 
+"""Loads the compiled genre automaton, compiling it first if it is missing, unreadable, or holds different genres than the database.
+
+Args:   genre_dictionary (GenreDictionary): Dictionary of all unique genres in the database.
+        path (str): Location of the compiled automaton (default: genres.dawg next to this file)
+
+Returns: GenreAutomaton or GenreTree: Automaton of all unique genres, or the trie if the automaton can't be written."""
+def LoadTree(genre_dictionary, path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "genres.dawg")):
+    from GenreAutomaton import CompileAutomaton, VocabularyHash
+    vocabulary = VocabularyHash(genre_dictionary.genre_names)
+    genre_automaton = OpenAutomaton(path, vocabulary)
+    if genre_automaton is None:
+        genre_tree = BuildTree(genre_dictionary)
+        try:
+            CompileAutomaton(genre_tree, path)
+        except (OSError, ValueError):
+            return genre_tree #Falls back to the trie if the file can't be written.
+        genre_automaton = OpenAutomaton(path, vocabulary)
+        if genre_automaton is None:
+            return genre_tree #Another process replaced the file with different genres in the meantime.
+    return genre_automaton
+
+"""Opens a compiled genre automaton if it holds the expected genres.
+
+Args:   path (str): Location of the compiled automaton
+        vocabulary (bytes): VocabularyHash of the genres in the database
+
+Returns: GenreAutomaton or None: The automaton, or None if it is missing, unreadable, or holds different genres"""
+def OpenAutomaton(path, vocabulary):
+    from GenreAutomaton import GenreAutomaton
+    try:
+        genre_automaton = GenreAutomaton(path)
+    except (OSError, ValueError):
+        return None
+    if genre_automaton.vocabulary != vocabulary:
+        genre_automaton.Close()
+        return None
+    return genre_automaton
+
 """Builds a list of genres based on the user's search terms. Restarts if the search terms are invalid.
 
-Args: genre_tree (GenreTree): Trie containing all unique genres in the database.
+Args: catalog (Catalog): Catalog providing the genre trie or automaton and the book index, which may still be loading when the first prompt is shown.
 
 Returns: list: A list of genres the user wishes to search."""
-def GenreList(genre_tree):
+def GenreList(catalog):
     genre_list = []
-    available_genres = sorted(genre_tree.ListGenres(genre_tree.root.children, "", []))
-    options_list = "The available genres are: " + ", ".join(available_genres[:-1]) + f", and {available_genres[-1]}.\n"
     user_input = input("Please enter a genre to search or a partial word to search for genres starting with those letters. Press Enter to see a list of genres available.\n")
+    genre_tree = catalog.GetGenreTree() #Waits for the background load only once the user has typed something.
+    book_index = catalog.GetBookIndex()
+    available_genres = genre_tree.AllGenres()
+    options_list = "The available genres are: " + ", ".join(available_genres[:-1]) + f", and {available_genres[-1]}.\n"
     while user_input == "":
         user_input = input(options_list)
     new_genre = SelectionConfirmation(genre_tree.SearchTree(user_input.lower()), genre_tree)
@@ -54,20 +235,35 @@ def GenreList(genre_tree):
             if more_searches.lower() in ["y", "yes"]:
                 user_input = input("Please enter another genre to add to the search or a partial word to search for genres starting with those letters. Press Enter to see a list of available genres.\n")
                 while user_input == "":
-                    user_input = input(options_list)
+                    user_input = input(RefinementOptions(genre_list, genre_tree, book_index))
                 new_genre = SelectionConfirmation(genre_tree.SearchTree(user_input.lower()), genre_tree)
                 if new_genre:
                     genre_list.append(new_genre)
                 else:
                     continue
     else:
-        return GenreList(genre_tree) #Restarts the function if no genre matches the first search.
+        return GenreList(catalog) #Restarts the function if no genre matches the first search.
     return genre_list
 
+"""Lists the genres that can still be added to a search, along with the number of books each would leave.
+
+Args:   genre_list (list): Genres already in the search
+        genre_tree (GenreTree or GenreAutomaton): Trie or automaton containing all unique genres in the database.
+        book_index (BookIndex): Index of the books in the database.
+
+Returns: str: Prompt listing the remaining genres and their book counts"""
+def RefinementOptions(genre_list, genre_tree, book_index):
+    genre_ids = [genre_tree.GetId(genre) for genre in genre_list]
+    counts = book_index.RefinementCounts(book_index.MatchAll(genre_ids))
+    options = [f"{book_index.genre_dictionary.GetName(genre_id)} ({count})" for genre_id, count in counts.items() if genre_id not in genre_ids]
+    if len(options) == 0:
+        return "No other genres would leave any books in this search. Please enter a genre to add anyway.\n"
+    return "The genres that can be added, with the number of books that would be left, are: " + (options[0] if len(options) == 1 else f"{', '.join(options[:-1])}, and {options[-1]}") + ".\n"
+
 """Confirms the choice with the user, providing them a list of options if multiple genres match their search.
 
 Args:   genre_list (list): List of genres matching the user's search
-        genre_tree (GenreTree): Trie containing all unique genres in the database
+        genre_tree (GenreTree or GenreAutomaton): Trie or automaton containing all unique genres in the database
         retries (int): Tracks retry attempts (default: 3)
         
 Returns: str or bool: Selected genre or False if the search is invalid"""
@@ -100,38 +296,26 @@ def SelectionConfirmation(genre_list, genre_tree, retries = 3):
                 print("That's not a valid selection. Try again.")
                 return False
 
-"""Searches the database for books matching all searched genres (all books if no genres are entered).
-
-Args:   genres (list): List of searched genres
-        book_list (iterable): List of books in the database
-        bookdict (dict): Dictionary of book attributes
-        
-Returns: list of book titles matching the genres"""
-def BookSearch(genres, book_list, **bookdict):
-    if len(genres) == 0:
-        return list(book_list)
-    new_list = [book for book in book_list if all(genre in bookdict[book]["genres"] for genre in genres)]
-    return new_list
-
 """Filters books based on user preference
 
-Args:   books (list): List of book titles matching the initial search
+Args:   session (SearchSession): Search session holding the books matching the searched genres, narrowed as each filter is added
+        ranker (Ranker or None): Ranker to order the results with, or None to sort them by rating
+        limit (int or None): Number of best results to return (default: all of them)
         bookdict (dict): Dictionary of book attributes
         
 Returns: list: Filtered and sorted books"""
-def FilterOptions(books, **bookdict):
+def FilterOptions(session, ranker = None, limit = None, **bookdict):
     min_rating = min_size = max_size = min_series = max_series = oldest = newest = None
-    options = ["rating", "length", "series length", "date"]
-    user_choice = input(f"Would you like to filter books? You can filter the results by rating, length, series length, or date. Alternatively, type \"search\" to run the search.\n").lower()
+    options = ["rating", "length", "series length", "date", "keyword"]
+    user_choice = input(f"Would you like to filter books? You can filter the results by rating, length, series length, date, or keyword. Alternatively, type \"search\" to run the search.\n").lower()
     while user_choice not in options and user_choice != "search":
-        user_choice = input("Invalid option. You can filter the results by rating, length, series length, or date. Alternatively, enter \"search\" to search without filters.\n")
+        user_choice = input("Invalid option. You can filter the results by rating, length, series length, date, or keyword. Alternatively, enter \"search\" to search without filters.\n")
     if user_choice == "search":
-        filtered_books = BookFilter(books, min_rating, oldest, newest, min_size, max_size, min_series, max_series, **bookdict)
-        if len(filtered_books) > 1:
-            SortBooks(filtered_books, 0, len(filtered_books) - 1, **bookdict)
-        return filtered_books
+        return RankResults(session, ranker, limit, **bookdict)
     while user_choice != "search" and len(options) > 0:
         if user_choice in options:
+            if user_choice != "keyword":
+                PrintHistogram(user_choice, session.book_index.Facets(session.candidates))
             if user_choice == "rating":
                 min_rating = RatingsFilter()
                 if min_rating is not None:
@@ -188,33 +372,63 @@ def FilterOptions(books, **bookdict):
                     oldest = SetOldest(newest)
                     if oldest is not None:
                         options.remove("date")
+            elif user_choice == "keyword":
+                keywords = KeywordFilter()
+                if keywords is not None:
+                    session.SetKeywords(keywords)
+                    options.remove("keyword")
+            #Only the books still in the results are re-checked when a filter is added or tightened.
+            session.SetBound("rating", min_rating)
+            session.SetBound("length", min_size, max_size)
+            session.SetBound("series_length", min_series, max_series)
+            session.SetBound("release_date", oldest, newest)
+            print(f"Books matching so far: {session.Count()}")
         if len(options) > 0:
             options_string = (options[0] if len(options) == 1 else f"{options[0]} or {options[1]}" if len(options) == 2 else f"{', '.join(options[:-1])}, or {options[-1]}") #Format filter options for user prompt.
             user_choice = input(f"Would you like to add another filter? You can filter the results by {options_string}. Alternatively, type \"search\" to run the search.\n").lower()
             while user_choice not in options and user_choice != "search":
                 user_choice = input(f"Invalid option. You can filter the results by {options_string} or enter \"search\" to search without any additional filters.\n")
-    filtered_books = BookFilter(books, min_rating, oldest, newest, min_size, max_size, min_series, max_series, **bookdict)
+    return RankResults(session, ranker, limit, **bookdict)
+
+"""Orders the books matching a search. Keyword searches are ordered by BM25 relevance to the keywords.
+
+Args:   session (SearchSession): Search session holding the matching books
+        ranker (Ranker or None): Ranker to order the results with, or None to sort them by rating
+        limit (int or None): Number of best results to return, picked with a partial sort when ranking (default: all of them)
+        bookdict (dict): Dictionary of book attributes
+
+Returns: list: Book titles, best first"""
+def RankResults(session, ranker, limit = None, **bookdict):
+    if session.keywords is not None:
+        book_index = session.book_index
+        return [book_index.titles[book_id] for book_id, _ in book_index.text_index.Search(session.keywords, session.candidates, limit)]
+    if ranker is not None:
+        return ranker.TopBooks(session.candidates, limit, session.genre_ids)
+    filtered_books = session.Titles()
     if len(filtered_books) > 1:
         SortBooks(filtered_books, 0, len(filtered_books) - 1, **bookdict)
-    return filtered_books
-
-"""Filters books based on the user's preference.
-
-Args:   books (list): List of book titles matching the initial search
-        min_rating (float or None): Minimum rating filter
-        oldest (int or None): Earliest release year
-        newest (int or None): Latest release year
-        min_pages (int or None): Minimum page count
-        max_pages (int or None): Maximum page count
-        min_series (int or None): Minimum series length in pages
-        max_series (int or None): Maximum series length in pages
-        bookdict (dict): Dictionary of book attributes
-        
-Returns: list: Book titles matching all filters"""
-def BookFilter(books, min_rating, oldest, newest, min_pages, max_pages, min_series, max_series, **bookdict):
-    def matches(book):
-        return ((min_rating is None or bookdict[book]["rating"] >= min_rating) and (oldest is None or bookdict[book]["release_date"] >= oldest) and (newest is None or bookdict[book]["release_date"] <= newest) and (min_pages is None or bookdict[book]["length"] >= min_pages) and (max_pages is None or bookdict[book]["length"] <= max_pages) and (min_series is None or bookdict[book]["series_length"] >= min_series) and (max_series is None or bookdict[book]["series_length"] <= max_series))
-    return [book for book in books if matches(book)]
+    return filtered_books if limit is None else filtered_books[:limit]
+
+"""Shows how the current results are spread across the values of a filter.
+
+Args:   filter_name (str): Filter chosen by the user ("rating", "length", "series length", or "date")
+        facets (dict): Facets of the current results, as returned by BookIndex.Facets
+
+Returns: None"""
+def PrintHistogram(filter_name, facets):
+    field = {"rating": "rating", "length": "length", "series length": "series_length", "date": "release_date"}[filter_name]
+    histogram = facets[field]
+    if len(histogram) == 0:
+        return
+    from BookIndex import FACET_BUCKETS
+    width = FACET_BUCKETS[field]
+    print(f"The current results by {filter_name}:")
+    for bucket, count in histogram.items():
+        if field == "rating":
+            bucket_range = f"{bucket:.2f}-{bucket + width - 0.01:.2f}"
+        else:
+            bucket_range = f"{bucket}-{bucket + width - 1}"
+        print(f"  {bucket_range}: {count} book{'s' if count != 1 else ''}")
 
 """Gets and validates a minimum rating (0-5) from the user.
 
@@ -233,6 +447,18 @@ def RatingsFilter():
         except ValueError:
             print("That is not a valid rating.")
 
+"""Gets keywords to match against the titles, series, authors, shared universes, and notes of the books.
+
+Returns: str or None: Keywords or None if skipped"""
+def KeywordFilter():
+    while True:
+        user_keywords = input("What words should the books match? The last word can be partial. Press Enter to skip.\n")
+        if user_keywords == "":
+            return None
+        if any(character.isalnum() for character in user_keywords):
+            return user_keywords
+        print("Please enter at least one letter or number.")
+
 """Gets and validates a minimum page count (either for the first book or for a series), ensures it's not greater than max_size.
 
 Args: max_size (int or None): Maximum page count for validation
@@ -315,7 +541,8 @@ def SetNewest(oldest):
         except ValueError:
             print("That is not a valid amount.")
 
-"""Sorts books in-place by rating (descending) using quicksort.
+"""Sorts books in-place by rating (descending) using quicksort. Books with the same rating are sorted by title, so
+the order is the same on every run whatever pivots are picked.
 
 Args:   books (list): List of book titles to sort
         start (int): Starting index of the sublist
@@ -327,30 +554,54 @@ def SortBooks(books, start, end, **book_dict):
     if start >= end:
         return
     pivot_idx = random.randrange(start, end + 1) #Picks a random pivot for better average-case performance.
-    pivot_element = book_dict[books[pivot_idx]]["rating"]
+    pivot_element = (-book_dict[books[pivot_idx]]["rating"], books[pivot_idx])
     books[end], books[pivot_idx] = books[pivot_idx], books[end]
     lesser_than_pointer = start
     for idx in range(start, end):
-        if book_dict[books[idx]]["rating"] >= pivot_element:
+        if (-book_dict[books[idx]]["rating"], books[idx]) <= pivot_element:
             books[idx], books[lesser_than_pointer] = books[lesser_than_pointer], books[idx]
             lesser_than_pointer += 1
     books[lesser_than_pointer], books[end] = books[end], books[lesser_than_pointer]
     SortBooks(books, start, lesser_than_pointer - 1, **book_dict)
     SortBooks(books, lesser_than_pointer + 1, end, **book_dict)
 
-"""Displays books with formatted details and separators.
+"""Asks the user whether to group the results by author or shared universe.
+
+Returns: str or None: "author", "shared_universe", or None to list the results without grouping"""
+def GroupOption():
+    while True:
+        user_choice = input("Would you like the results grouped by author or universe? Press Enter to list them by rating.\n").lower()
+        if user_choice == "":
+            return None
+        if user_choice == "author":
+            return "author"
+        if user_choice in ["universe", "shared universe"]:
+            return "shared_universe"
+        print("Please select author or universe.")
+
+"""Displays books with formatted details and separators, along with other books by the same author or in the same shared universe.
 
 Args:   sorted_books (list): List of book titles to display
+        book_index (BookIndex): Index used to find related books and group the results
+        group_by (str or None): "author" or "shared_universe" to group the results, ranked by each group's best rating
         bookdict (dict): Dictionary of book attributes
         
 Returns: None"""
-def PrintBooks(sorted_books, **bookdict):
+def PrintBooks(sorted_books, book_index, group_by = None, **bookdict):
     if len(sorted_books) == 0:
         print("No books in the database match your search.")
+    elif group_by is not None:
+        for group_name, books in book_index.GroupResults(sorted_books, group_by):
+            print(f"================ {group_name} ================")
+            PrintBooks(books, book_index, **bookdict)
     else:
         for index, book in enumerate(sorted_books):
             print("/////////////////////////////////")
             print(BookDesc(book, **bookdict))
+            for field, label in [("shared_universe", "More from"), ("author", "More by")]:
+                related_books = book_index.RelatedBooks(book, field)
+                if related_books:
+                    print(f"{label} {bookdict[book][field]}: {', '.join(related_books)}")
             print("/////////////////////////////////")
             if index < len(sorted_books) - 1:
                 print("*********************************")
@@ -392,4 +643,13 @@ def SearchAgain():
         return SearchAgain()
 
 if __name__ == "__main__":
-    main(booklist)
\ No newline at end of file
+    import argparse
+    from Ranking import RANKING_FORMULAS
+    parser = argparse.ArgumentParser(description = "Search for books and series by genre.")
+    parser.add_argument("--ranking", choices = sorted(RANKING_FORMULAS), help = "order results with a ranking formula instead of by rating")
+    parser.add_argument("--eager", action = "store_true", help = "load the database and build the search structures before the first prompt")
+    parser.add_argument("--timing", action = "store_true", help = "report import and first-prompt latency")
+    parser.add_argument("--query-log", help = "JSONL file to append each search to, for replaying with replay.py")
+    parser.add_argument("--limit", type = int, help = "show only this many of the best results")
+    arguments = parser.parse_args()
+    main(ranking = arguments.ranking, lazy = not arguments.eager, timing = arguments.timing, query_log = arguments.query_log, limit = arguments.limit)
\ No newline at end of file
@@ -0,0 +1,155 @@
+#Query-log replay and load-test tool. Replays recorded searches against the search code at a fixed rate or as fast as
+#possible, on one or more worker processes, and reports throughput and latency. Given a second copy of the code, it
+#also replays the log against that copy and reports every search whose results differ.
+#
+#The query log is a JSONL file with one search per line, as written by booksearch.py --query-log:
+#{"genres": ["fantasy"], "bounds": {"rating": [4.0, null]}, "keywords": "ring", "ranking": null, "limit": 10}
+#Every key is optional. "bounds" maps a column name to [low, high], "ranking" names a formula in RANKING_FORMULAS, and
+#"limit" is the number of best results to return.
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+#Catalog and search function of the engine loaded in this worker process, set by LoadEngine
+worker_engine = None
+
+"""Imports the search code from a directory and loads its catalog, including the text index, so replayed queries
+don't pay for building anything. Runs once in each worker process, from its first task, so a failure reaches the
+parent as an exception instead of making the pool restart the worker forever.
+
+Args: engine_path (str): Directory containing the booksearch.py to replay against
+
+Returns: None"""
+def LoadEngine(engine_path):
+    global worker_engine
+    engine_path = os.path.abspath(engine_path)
+    #The worker starts with replay.py's directory on the path, which would fill in any module the engine lacks.
+    own_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [engine_path] + [path for path in sys.path if os.path.abspath(path or ".") != own_path]
+    try:
+        import booksearch
+        catalog = booksearch.Catalog(background = False)
+        run_search = booksearch.RunSearch
+    except Exception as error:
+        raise ValueError(f"{engine_path} can't be replayed against: {error!r}") from None
+    if os.path.dirname(os.path.abspath(booksearch.__file__)) != engine_path:
+        raise ValueError(f"{engine_path} can't be replayed against: booksearch was imported from {booksearch.__file__}")
+    catalog.LoadAll()
+    getattr(catalog.GetBookIndex(), "text_index", None) #Builds the text index, which LoadAll leaves to the first keyword search
+    worker_engine = (catalog, run_search)
+
+"""Runs a worker's share of the queries, spacing them out to a fixed rate if one is given.
+
+Args: task (tuple): Directory of the engine, (query number, query) pairs, and the queries per second for this worker, or None for maximum speed
+
+Returns: tuple: (query number, results, latency in seconds) for each query, and the worker's start and end times"""
+def ReplayQueries(task):
+    engine_path, queries, rate = task
+    if worker_engine is None:
+        LoadEngine(engine_path)
+    catalog, run_search = worker_engine
+    for ranking in {query.get("ranking") for _, query in queries} - {None}:
+        catalog.GetRanker(ranking) #Built before timing starts, like the rest of the catalog
+    replayed = []
+    start = time.perf_counter()
+    for position, (number, query) in enumerate(queries):
+        if rate:
+            delay = start + position / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        query_start = time.perf_counter()
+        results = run_search(catalog, query.get("genres", ()), query.get("bounds"), query.get("keywords"), query.get("ranking"), query.get("limit"))
+        replayed.append((number, results, time.perf_counter() - query_start))
+    return replayed, start, time.perf_counter()
+
+"""Replays a query log against one engine.
+
+Args:   engine_path (str): Directory containing the booksearch.py to replay against
+        queries (list): Queries read from the log
+        workers (int): Number of worker processes
+        rate (float or None): Total queries per second, or None for maximum speed
+
+Returns: tuple: Results of each query in log order, latency of each query in seconds, and total time in seconds"""
+def Replay(engine_path, queries, workers, rate):
+    numbered = list(enumerate(queries))
+    tasks = [(engine_path, numbered[worker::workers], rate / workers if rate else None) for worker in range(workers)]
+    #Spawned workers start from a clean interpreter, so two engines never share imported modules.
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        chunks = pool.map(ReplayQueries, tasks)
+    results = [None] * len(queries)
+    latencies = [0.0] * len(queries)
+    for replayed, _, _ in chunks:
+        for number, books, latency in replayed:
+            results[number] = books
+            latencies[number] = latency
+    elapsed = max(end for _, _, end in chunks) - min(start for _, start, _ in chunks) if queries else 0.0
+    return results, latencies, elapsed
+
+"""Prints the throughput and a latency histogram with power-of-two microsecond buckets.
+
+Args:   label (str): Name of the engine
+        latencies (list): Latency of each query in seconds
+        elapsed (float): Total replay time in seconds
+
+Returns: None"""
+def PrintReport(label, latencies, elapsed):
+    print(f"{label}: {len(latencies)} queries in {elapsed:.3f} s ({len(latencies) / elapsed if elapsed else 0:.0f} queries/s)")
+    if len(latencies) == 0:
+        return
+    ordered = sorted(latencies)
+    percentiles = ", ".join(f"p{percentile} {ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)] * 1e6:.0f} us" for percentile in [50, 90, 99])
+    print(f"  latency: {percentiles}, max {ordered[-1] * 1e6:.0f} us")
+    histogram = {}
+    for latency in latencies:
+        bucket = 1 << max(0, int(latency * 1e6)).bit_length() #Smallest power of two above the latency in microseconds
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    largest = max(histogram.values())
+    for bucket, count in sorted(histogram.items()):
+        print(f"  < {bucket:>7} us: {count:>7} {'#' * max(1, count * 40 // largest)}")
+
+"""Compares the results of two engines. Every search orders its results deterministically, so results with the
+same books in a different order count as mismatches too.
+
+Args:   queries (list): Queries read from the log
+        results (list): Results of the first engine
+        other_results (list): Results of the second engine
+
+Returns: bool: True if every query returned the same books in the same order"""
+def CompareResults(queries, results, other_results):
+    different_books = [number for number, (books, other_books) in enumerate(zip(results, other_results)) if sorted(books) != sorted(other_books)]
+    different_order = [number for number, (books, other_books) in enumerate(zip(results, other_results)) if books != other_books and sorted(books) == sorted(other_books)]
+    print(f"Comparison: {len(queries) - len(different_books) - len(different_order)} identical, {len(different_order)} same books in a different order, {len(different_books)} different books")
+    for number in different_books[:10]:
+        print(f"  query {number + 1} {json.dumps(queries[number])}: {len(results[number])} vs {len(other_results[number])} books")
+    for number in different_order[:10]:
+        first_difference = next(position for position, (book, other_book) in enumerate(zip(results[number], other_results[number])) if book != other_book)
+        print(f"  query {number + 1} {json.dumps(queries[number])}: order differs from result {first_difference + 1}")
+    return len(different_books) == 0 and len(different_order) == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Replay a query log against the book search code and report throughput and latency.")
+    parser.add_argument("log", help = "JSONL query log")
+    parser.add_argument("--engine", default = os.path.dirname(os.path.abspath(__file__)), help = "directory containing the booksearch.py to replay against (default: this directory)")
+    parser.add_argument("--compare", help = "directory containing another version of booksearch.py to check for the same results")
+    parser.add_argument("--workers", type = int, default = 1, help = "number of worker processes")
+    parser.add_argument("--rate", type = float, help = "total queries per second (default: as fast as possible)")
+    parser.add_argument("--repeat", type = int, default = 1, help = "number of times to replay the log")
+    arguments = parser.parse_args()
+    for engine_path in [arguments.engine, arguments.compare]:
+        if engine_path is not None and not os.path.isfile(os.path.join(engine_path, "booksearch.py")):
+            parser.error(f"{engine_path} does not contain booksearch.py")
+    with open(arguments.log) as log_file:
+        queries = [json.loads(line) for line in log_file if line.strip()] * arguments.repeat
+    try:
+        results, latencies, elapsed = Replay(arguments.engine, queries, arguments.workers, arguments.rate)
+        PrintReport(arguments.engine, latencies, elapsed)
+        if arguments.compare:
+            other_results, other_latencies, other_elapsed = Replay(arguments.compare, queries, arguments.workers, arguments.rate)
+            PrintReport(arguments.compare, other_latencies, other_elapsed)
+    except (ImportError, ValueError) as error: #Raised by an engine that can't be loaded or lacks a module it needs
+        sys.exit(f"replay.py: error: {error}")
+    if arguments.compare and not CompareResults(queries, results, other_results):
+        sys.exit(1)